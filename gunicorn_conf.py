@@ -0,0 +1,17 @@
+"""Gunicorn configuration for the Document Portal API.
+
+Run with:
+    gunicorn -c gunicorn_conf.py api.main:app
+
+UvicornWorker already defaults to the uvloop event loop and the httptools
+HTTP parser when they are installed (both pinned in requirements.txt), so
+each worker serves async handlers without falling back onto the AnyIO
+thread pool.
+"""
+import os
+
+bind = "0.0.0.0:8080"
+workers = (os.cpu_count() or 1) * 2 + 1
+worker_class = "uvicorn.workers.UvicornWorker"
+worker_connections = 1000
+keepalive = 5
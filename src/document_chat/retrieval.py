@@ -1,8 +1,11 @@
 import sys
 import os
+import hashlib
 from operator import itemgetter
 from typing import List, Optional, Dict, Any
 
+from cachetools import TTLCache
+
 from langchain_core.messages import BaseMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
@@ -14,6 +17,12 @@ from logger import GLOBAL_LOGGER as log
 from prompt.prompt_library import PROMPT_REGISTRY
 from model.models import PromptType
 
+# Repeated identical questions dominate RAG cost; answers are cached for 10
+# minutes keyed by (question digest, session, index version). The index
+# version comes from the FAISS file's mtime, so a reindex invalidates
+# naturally. Module-level so every per-request ConversationalRAG shares it.
+_ANSWER_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=600)
+
 
 class ConversationalRAG:
     """
@@ -41,6 +50,7 @@ class ConversationalRAG:
             # Lazy pieces
             self.retriever = retriever
             self.chain = None
+            self._retriever_version: Optional[int] = None  # set when loaded from FAISS
             if self.retriever is not None:
                 self._build_lcel_chain()
 
@@ -80,6 +90,12 @@ class ConversationalRAG:
             self.retriever = vectorstore.as_retriever(
                 search_type=search_type, search_kwargs=search_kwargs
             )
+            index_file = os.path.join(index_path, f"{index_name}.faiss")
+            # Nanosecond mtime: whole-second granularity let a rebuild landing
+            # in the same second keep serving the previous cached answers.
+            self._retriever_version = os.stat(
+                index_file if os.path.exists(index_file) else index_path
+            ).st_mtime_ns
             self._build_lcel_chain()
 
             log.info(
@@ -103,6 +119,17 @@ class ConversationalRAG:
                     "RAG chain not initialized. Call load_retriever_from_faiss() before invoke().", sys
                 )
             chat_history = chat_history or []
+
+            # History-free questions against a known index version are cacheable.
+            cache_key = None
+            if not chat_history and self._retriever_version is not None:
+                digest = hashlib.blake2s(user_input.lower().strip().encode("utf-8")).hexdigest()
+                cache_key = (digest, self.session_id, self._retriever_version)
+                cached = _ANSWER_CACHE.get(cache_key)
+                if cached is not None:
+                    log.info("Answer cache hit", session_id=self.session_id, user_input=user_input)
+                    return cached
+
             payload = {"input": user_input, "chat_history": chat_history}
             answer = self.chain.invoke(payload)
             if not answer:
@@ -110,6 +137,8 @@ class ConversationalRAG:
                     "No answer generated", user_input=user_input, session_id=self.session_id
                 )
                 return "no answer generated."
+            if cache_key is not None:
+                _ANSWER_CACHE[cache_key] = answer
             log.info(
                 "Chain invoked successfully",
                 session_id=self.session_id,
@@ -1,38 +1,50 @@
 import os
 import requests
 import pytest
+from requests.adapters import HTTPAdapter
 
 # Environment variables set dynamically in GitHub Actions
 BASE_URL = os.getenv("ECS_APP_URL")  # e.g., http://<task-public-ip>:8080
 
+
+@pytest.fixture(scope="module")
+def session():
+    """Shared keep-alive session so each test reuses one TCP+TLS connection."""
+    s = requests.Session()
+    s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    yield s
+    s.close()
+
+
 @pytest.mark.smoke
-def test_homepage_reachable():
+def test_homepage_reachable(session):
     """
     Verify homepage is reachable after ECS deployment.
     """
-    response = requests.get(f"{BASE_URL}/", timeout=10)
+    response = session.get(f"{BASE_URL}/", timeout=10)
     assert response.status_code == 200
     assert "Document Portal" in response.text
 
 
 @pytest.mark.smoke
-def test_healthcheck_endpoint():
+def test_healthcheck_endpoint(session):
     """
     Verify /health endpoint for service health.
     """
-    response = requests.get(f"{BASE_URL}/health", timeout=10)
+    response = session.get(f"{BASE_URL}/health", timeout=10)
     assert response.status_code == 200
     data = response.json()
     assert data.get("status") == "ok"
 
 
 @pytest.mark.smoke
-def test_api_inference_response():
+def test_api_inference_response(session):
     """
     Ensure RAG inference endpoint returns valid response.
     """
     payload = {"query": "Summarize the device safety information."}
-    response = requests.post(f"{BASE_URL}/api/infer", json=payload, timeout=20)
+    response = session.post(f"{BASE_URL}/api/infer", json=payload, timeout=20)
     assert response.status_code == 200
     result = response.json()
     assert "summary" in result
@@ -124,19 +124,25 @@ def test_health_check():
 # @patch("api.main.ConversationalRAG.invoke")
 # @patch("api.main.ConversationalRAG.load_retriever_from_faiss")
 # def test_concurrent_queries(mock_load, mock_invoke):
+#     # Threads against TestClient serialize through the event loop; dispatch
+#     # the five requests through httpx.AsyncClient + asyncio.gather instead
+#     # so they are genuinely in flight together, like under uvicorn.
 #     mock_invoke.return_value = "Concurrent mock answer"
-#     from concurrent.futures import ThreadPoolExecutor
-
-#     def call_query():
-#         resp = client.post("/chat/query",
-#                            data={"question": "Hi", "session_id": "sess1"})
-#         return resp.status_code, resp.json()["answer"]
-
-#     with ThreadPoolExecutor(max_workers=5) as executor:
-#         results = list(executor.map(lambda _: call_query(), range(5)))
-#     for status, answer in results:
-#         assert status == 200
-#         assert answer == "Concurrent mock answer"
+#     import asyncio
+#     import httpx
+
+#     async def run_queries():
+#         transport = httpx.ASGITransport(app=app)
+#         async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+#             return await asyncio.gather(*[
+#                 ac.post("/chat/query",
+#                         data={"question": "Hi", "session_id": "sess1"})
+#                 for _ in range(5)
+#             ])
+
+#     for resp in asyncio.run(run_queries()):
+#         assert resp.status_code == 200
+#         assert resp.json()["answer"] == "Concurrent mock answer"
 
 # # =========================================
 # # 11. File Update / Reindex Test 
@@ -1,129 +1,346 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Iterable, List
+from types import MappingProxyType
+from typing import Final, Iterable, Iterator, List, Optional
 from fastapi import UploadFile
 from langchain.schema import Document
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader, UnstructuredPowerPointLoader, UnstructuredMarkdownLoader, UnstructuredExcelLoader, CSVLoader, UnstructuredImageLoader
+from langchain_community.document_loaders import PyMuPDFLoader, Docx2txtLoader, TextLoader, UnstructuredPowerPointLoader, UnstructuredMarkdownLoader, UnstructuredExcelLoader, CSVLoader, UnstructuredImageLoader
 from logger import GLOBAL_LOGGER as log
 from exception.custom_exception import DocumentPortalException
 from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.types import LargeBinary
 from langchain_google_genai import ChatGoogleGenerativeAI
-import base64, os
+import asyncio, csv, functools, gc, hashlib, io, mimetypes, os, threading
+import aiofiles
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from bs4 import BeautifulSoup
 
-SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt", ".ppt", ".pptx", ".md", ".csv", ".xlsx", ".db", ".sqlite", ".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp", ".html", ".htm", ".xhtml"}
+# Canonical extension set — other modules import this rather than keeping
+# their own copies. Frozen so nothing can mutate it at runtime.
+SUPPORTED_EXTENSIONS: Final[frozenset[str]] = frozenset({".pdf", ".docx", ".txt", ".ppt", ".pptx", ".md", ".csv", ".xlsx", ".db", ".sqlite", ".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp", ".html", ".htm", ".xhtml"})
 
-def extract_html(file_path: str) -> list[Document]:
-    with open(file_path, "r", encoding="utf-8") as f:
-        html = f.read()
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style"]):
+def _make_soup(html: str) -> BeautifulSoup:
+    try:
+        return BeautifulSoup(html, "lxml")  # C parser, 5-10x faster on big documents
+    except Exception:
+        return BeautifulSoup(html, "html.parser")
+
+def _html_to_docs(html: str, file_path: str) -> list[Document]:
+    soup = _make_soup(html)
+    # One CSS-selector pass (C-backed under lxml) instead of a name-list tree walk.
+    for tag in soup.select("script, style, noscript, template"):
         tag.decompose()
     text = soup.get_text(separator="\n", strip=True)
     return [Document(page_content=text, metadata={"source": file_path})]
 
+def extract_html(file_path: str) -> list[Document]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        html = f.read()
+    return _html_to_docs(html, file_path)
 
-def describe_image_ai(image_path: str) -> Document:
-    """
-    Describe the image content using Google's Gemini model via LangChain.
-    """
-    model_name = "gemini-2.0-flash"
-    temperature = 0
-    max_output_tokens = 2048
-
-    client = ChatGoogleGenerativeAI(
-                    model=model_name,
-                    google_api_key=os.getenv("GOOGLE_API_KEY"),
-                    temperature=temperature,
-                    max_output_tokens=max_output_tokens
-                )
-    
-    with open(image_path, "rb") as f:
-        img_base64 = base64.b64encode(f.read()).decode("utf-8")
+async def extract_html_async(file_path: str) -> list[Document]:
+    """Async variant of extract_html — reads via aiofiles so the event loop stays free."""
+    async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
+        html = await f.read()
+    return _html_to_docs(html, file_path)
+
+
+@functools.lru_cache(maxsize=1)
+def _gemini_client() -> ChatGoogleGenerativeAI:
+    """Shared Gemini client — constructing one per call pays client init + TLS setup each time."""
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        temperature=0,
+        max_output_tokens=2048,
+    )
 
-    response = client.invoke([
+def _build_image_message(image_path: str, data: bytes) -> list:
+    # Raw bytes go straight into the Gemini request as an inline media part;
+    # the old data-URL form paid an extra base64 pass and ~33% more memory.
+    mime, _ = mimetypes.guess_type(image_path)
+    return [
         {
             "role": "user",
             "content": [
                 {"type": "text", "text": "Describe this image in detail."},
-                {"type": "image_url", "image_url": f"data:image/jpeg;base64,{img_base64}"}
+                {"type": "media", "mime_type": mime or "image/jpeg", "data": data}
             ]
         }
-    ])
+    ]
+
+def _image_message(image_path: str) -> list:
+    with open(image_path, "rb") as f:
+        return _build_image_message(image_path, f.read())
+
+async def _image_message_async(image_path: str) -> list:
+    async with aiofiles.open(image_path, "rb") as f:
+        return _build_image_message(image_path, await f.read())
+
+def describe_image_ai(image_path: str) -> Document:
+    """
+    Describe the image content using Google's Gemini model via LangChain.
+    """
+    response = _gemini_client().invoke(_image_message(image_path))
     return Document(page_content=response.content)
 
-def load_sql_database(connection_string: str) -> List[Document]:
+async def _describe_many(paths: List[str]) -> List[Document]:
+    client = _gemini_client()
+    sem = asyncio.Semaphore(8)  # keep well under Gemini rate limits
+
+    async def _one(p: str) -> Document:
+        message = await _image_message_async(p)  # overlaps file reads with in-flight calls
+        async with sem:
+            response = await client.ainvoke(message)
+        return Document(page_content=response.content)
+
+    return list(await asyncio.gather(*(_one(p) for p in paths)))
+
+def describe_images_ai(paths: List[str]) -> List[Document]:
+    """
+    Describe a batch of images with the shared Gemini client, overlapping the
+    N network round-trips via asyncio.gather instead of N serial invokes.
+    """
+    if len(paths) == 1:
+        return [describe_image_ai(paths[0])]
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_describe_many(paths))
+    # Already inside a running loop (the async FastAPI handlers call into
+    # this synchronously) — asyncio.run would raise, so gather on a fresh
+    # loop in a worker thread instead.
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, _describe_many(paths)).result()
+
+# Binary-payload column types outside the LargeBinary hierarchy — every SQL
+# blob variant (BLOB, BYTEA, LONGBLOB, ...) subclasses LargeBinary and is
+# caught by isinstance, but TypeDecorator wrappers like PickleType are not.
+_LOB_COLUMN_TYPES = {"PickleType"}
+
+def _is_lob_column(col_type) -> bool:
+    return isinstance(col_type, LargeBinary) or col_type.__class__.__name__ in _LOB_COLUMN_TYPES
+
+def load_sql_database(connection_string: str, batch_size: int = 5000) -> List[Document]:
     """
     Load data from any SQL database using SQLAlchemy.
+
+    Rows are streamed through a server-side cursor and flushed into one
+    Document per `batch_size` rows, so large tables never sit fully in RAM.
+    Binary (LOB) columns are skipped and identifiers are dialect-quoted
+    rather than interpolated bare.
     """
     engine = create_engine(connection_string)
     inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
 
     docs: List[Document] = []
-    with engine.connect() as conn:
+    with engine.connect().execution_options(stream_results=True, yield_per=10_000) as conn:
         for table_name in inspector.get_table_names():
-            result = conn.execute(text(f"SELECT * FROM {table_name}"))
-            col_names = result.keys()
-            rows = result.fetchall()
-            text_data = f"Table: {table_name}\nColumns: {', '.join(col_names)}\nRows:\n"
-            for row in rows:
-                text_data += f"{row}\n"
-            docs.append(Document(page_content=text_data))
+            cols = [
+                c["name"] for c in inspector.get_columns(table_name)
+                if not _is_lob_column(c["type"])
+            ]
+            if not cols:
+                log.warning("Table skipped, only binary columns", table=table_name)
+                continue
+            col_list = ", ".join(preparer.quote(c) for c in cols)
+            result = conn.execute(text(f"SELECT {col_list} FROM {preparer.quote(table_name)}"))
+            col_names = list(result.keys())
+
+            def _new_shard():
+                # CSV rows instead of tuple repr: the writer formats in C and
+                # the output is machine-readable for the downstream LLM.
+                b = io.StringIO()
+                b.write(f"Table: {table_name}\n")
+                w = csv.writer(b)
+                w.writerow(col_names)
+                return b, w
+
+            buf, writer = _new_shard()
+            shard = 0
+            rows_in_shard = 0
+            for row in result:
+                writer.writerow(row)
+                rows_in_shard += 1
+                if rows_in_shard >= batch_size:
+                    docs.append(Document(page_content=buf.getvalue(), metadata={"table": table_name, "shard": shard}))
+                    shard += 1
+                    rows_in_shard = 0
+                    buf, writer = _new_shard()
+            if rows_in_shard or shard == 0:
+                docs.append(Document(page_content=buf.getvalue(), metadata={"table": table_name, "shard": shard}))
+            gc.collect()  # release per-table row buffers before the next table
     return docs
 
-def load_documents(paths: Iterable[Path]) -> List[Document]:
-    """Load docs using appropriate loader based on extension or database URL."""
-    docs: List[Document] = []
+# Extensions whose loaders are IO/network bound (DB reads, Gemini calls) —
+# these go through a thread pool; everything else is parser CPU and goes
+# through a process pool. Images are split out so they can be batched into
+# a single gathered Gemini call.
+_IMAGE_EXTENSIONS: Final[frozenset[str]] = frozenset({".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp"})
+_IO_BOUND_EXTENSIONS: Final[frozenset[str]] = frozenset({".db", ".sqlite", ".html", ".htm", ".xhtml"}) | _IMAGE_EXTENSIONS
+
+# O(1) extension -> loader dispatch instead of a long if/elif chain.
+_loaders = {
+    ".pdf": lambda p: PyMuPDFLoader(str(p)).load(),
+    ".docx": lambda p: Docx2txtLoader(str(p)).load(),
+    ".txt": lambda p: TextLoader(str(p), encoding="utf-8").load(),
+    ".md": lambda p: UnstructuredMarkdownLoader(str(p)).load(),
+    ".csv": lambda p: CSVLoader(file_path=str(p), encoding="utf-8").load(),
+    ".xlsx": lambda p: UnstructuredExcelLoader(str(p)).load(),
+}
+for _ext in (".ppt", ".pptx"):
+    _loaders[_ext] = lambda p: UnstructuredPowerPointLoader(str(p)).load()
+for _ext in (".db", ".sqlite"):
+    _loaders[_ext] = lambda p: load_sql_database(f"sqlite:///{p}")
+for _ext in _IMAGE_EXTENSIONS:
+    _loaders[_ext] = lambda p: [describe_image_ai(str(p))]
+for _ext in (".html", ".htm", ".xhtml"):
+    _loaders[_ext] = lambda p: extract_html(str(p))
+LOADERS: Final = MappingProxyType(_loaders)
+
+# In-process LRU of parsed files keyed by (path, mtime, size) fingerprint —
+# re-indexing the same file (e.g. repeated /chat/index calls) skips the parse.
+# Mutations are locked: the thread-pool branch of load_documents hits this
+# concurrently, and move_to_end/popitem are not atomic on an OrderedDict.
+_DOC_CACHE: "OrderedDict[str, List[Document]]" = OrderedDict()
+_DOC_CACHE_MAX = 128
+_DOC_CACHE_LOCK = threading.Lock()
+
+def _fingerprint_path(p: Path) -> str:
+    st = os.stat(p)
+    return hashlib.blake2b(f"{p}:{st.st_mtime_ns}:{st.st_size}".encode()).hexdigest()
+
+def _doc_cache_get(p: Path) -> Optional[List[Document]]:
+    try:
+        key = _fingerprint_path(p)
+    except OSError:
+        return None
+    with _DOC_CACHE_LOCK:
+        cached = _DOC_CACHE.get(key)
+        if cached is None:
+            return None
+        _DOC_CACHE.move_to_end(key)
+        return list(cached)
+
+def _doc_cache_put(p: Path, docs: List[Document]) -> None:
+    try:
+        key = _fingerprint_path(p)
+    except OSError:
+        return
+    with _DOC_CACHE_LOCK:
+        _DOC_CACHE[key] = list(docs)
+        _DOC_CACHE.move_to_end(key)
+        if len(_DOC_CACHE) > _DOC_CACHE_MAX:
+            _DOC_CACHE.popitem(last=False)
+
+def _load_one(p: Path) -> List[Document]:
+    """Load a single file via the LOADERS table (top-level so it is picklable)."""
+    fn = LOADERS.get(p.suffix.lower())
+    if fn is None:
+        log.warning("Unsupported extension skipped", path=str(p))
+        return []
+    cached = _doc_cache_get(p)
+    if cached is not None:
+        log.info("Loader cache hit", path=str(p))
+        return cached
+    docs = fn(p)
+    _doc_cache_put(p, docs)
+    return docs
+
+def iter_documents(paths: Iterable[Path]) -> Iterator[Document]:
+    """Stream Documents one file — and for PDFs one page — at a time.
+
+    Memory-constant alternative to load_documents for very large uploads: PDF
+    pages come off PyMuPDFLoader.lazy_load individually instead of as a
+    per-file list, so RAM use does not grow with page count. Skips the
+    worker pools and the parse cache, which both need whole-file lists.
+    """
     try:
         for p in paths:
-            ext = p.suffix.lower()
-            if ext == ".pdf":
-                loader = PyPDFLoader(str(p))
-                docs.extend(loader.load())
-            elif ext == ".docx":
-                loader = Docx2txtLoader(str(p))
-                docs.extend(loader.load())
-            elif ext == ".txt":
-                loader = TextLoader(str(p), encoding="utf-8")
-                docs.extend(loader.load())
-            elif ext in [".ppt", ".pptx"]:
-                loader = UnstructuredPowerPointLoader(str(p))
-                docs.extend(loader.load())
-            elif ext == ".md":
-                loader = UnstructuredMarkdownLoader(str(p))
-                docs.extend(loader.load())
-            elif ext == ".csv":
-                loader = CSVLoader(file_path=str(p), encoding="utf-8")
-                docs.extend(loader.load())
-            elif ext == ".xlsx":
-                loader = UnstructuredExcelLoader(str(p))
-                docs.extend(loader.load())
-            elif ext in [".db", ".sqlite"]:
-                connection_url = f"sqlite:///{p}"
-                docs.extend(load_sql_database(connection_url))
-            elif ext in [".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp"]:
-                docs.append(describe_image_ai(str(p)))
-            elif ext in [".html", ".htm", ".xhtml"]:
-                docs.extend(extract_html(str(p)))
+            if p.suffix.lower() == ".pdf":
+                yield from PyMuPDFLoader(str(p)).lazy_load()
+            else:
+                yield from _load_one(p)
+    except Exception as e:
+        log.error("Failed streaming documents", error=str(e))
+        raise DocumentPortalException("Error loading documents", e) from e
+
+def load_documents(paths: Iterable[Path]) -> List[Document]:
+    """Load docs using appropriate loader based on extension or database URL.
+
+    Files are parsed concurrently: CPU-bound parsers (PDF/Docx/PPTX/...) run
+    in a process pool, while IO/network-bound loaders (images, HTML, SQL) run
+    in a thread pool. Results are merged back in the original path order.
+    """
+    try:
+        paths = list(paths)
+        results: List[List[Document]] = [[] for _ in paths]
+        cpu_jobs = [(i, p) for i, p in enumerate(paths) if p.suffix.lower() not in _IO_BOUND_EXTENSIONS]
+        image_jobs = [(i, p) for i, p in enumerate(paths) if p.suffix.lower() in _IMAGE_EXTENSIONS]
+        io_jobs = [(i, p) for i, p in enumerate(paths) if p.suffix.lower() in _IO_BOUND_EXTENSIONS - _IMAGE_EXTENSIONS]
+        # Resolve cache hits in the parent: cache writes made inside process
+        # pool children die with the child, so misses are dispatched and the
+        # parent stores their results afterwards.
+        cpu_misses = []
+        for i, p in cpu_jobs:
+            cached = _doc_cache_get(p)
+            if cached is not None:
+                log.info("Loader cache hit", path=str(p))
+                results[i] = cached
             else:
-                log.warning("Unsupported extension skipped", path=str(p))
+                cpu_misses.append((i, p))
+        if len(cpu_misses) > 1:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+                for (i, p), sub in zip(cpu_misses, ex.map(_load_one, [p for _, p in cpu_misses])):
+                    results[i] = sub
+                    _doc_cache_put(p, sub)
+        elif cpu_misses:
+            i, p = cpu_misses[0]
+            results[i] = _load_one(p)
+        if image_jobs:
+            for (i, _), doc in zip(image_jobs, describe_images_ai([str(p) for _, p in image_jobs])):
+                results[i] = [doc]
+        if len(io_jobs) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(io_jobs))) as ex:
+                for (i, _), sub in zip(io_jobs, ex.map(_load_one, [p for _, p in io_jobs])):
+                    results[i] = sub
+        elif io_jobs:
+            i, p = io_jobs[0]
+            results[i] = _load_one(p)
+        docs = [d for sub in results for d in sub]
         log.info("Documents loaded", count=len(docs))
         return docs
     except Exception as e:
         log.error("Failed loading documents", error=str(e))
         raise DocumentPortalException("Error loading documents", e) from e
 
-def concat_for_analysis(docs: List[Document]) -> str:
-    parts = []
+def concat_for_analysis(docs: Iterable[Document]) -> str:
+    # Generator fed straight into join — no intermediate list of parts.
+    return "\n".join(
+        f"\n--- SOURCE: {d.metadata.get('source') or d.metadata.get('file_path') or 'unknown'} ---\n{d.page_content}"
+        for d in docs
+    )
+
+def _write_docs(buf: io.StringIO, docs: Iterable[Document]) -> None:
+    first = True
     for d in docs:
         src = d.metadata.get("source") or d.metadata.get("file_path") or "unknown"
-        parts.append(f"\n--- SOURCE: {src} ---\n{d.page_content}")
-    return "\n".join(parts)
+        if not first:
+            buf.write("\n")
+        buf.write(f"\n--- SOURCE: {src} ---\n{d.page_content}")
+        first = False
 
-def concat_for_comparison(ref_docs: List[Document], act_docs: List[Document]) -> str:
-    left = concat_for_analysis(ref_docs)
-    right = concat_for_analysis(act_docs)
-    return f"<<REFERENCE_DOCUMENTS>>\n{left}\n\n<<ACTUAL_DOCUMENTS>>\n{right}"
+def concat_for_comparison(ref_docs: Iterable[Document], act_docs: Iterable[Document]) -> str:
+    # Single pass into one buffer — the two-sided f-string form peaked at
+    # ~3x the final payload size, and /compare sees the largest payloads.
+    buf = io.StringIO()
+    buf.write("<<REFERENCE_DOCUMENTS>>\n")
+    _write_docs(buf, ref_docs)
+    buf.write("\n\n<<ACTUAL_DOCUMENTS>>\n")
+    _write_docs(buf, act_docs)
+    return buf.getvalue()
 
 # ---------- Helpers ----------
 class FastAPIFileAdapter:
@@ -131,9 +348,23 @@ class FastAPIFileAdapter:
     def __init__(self, uf: UploadFile):
         self._uf = uf
         self.name = uf.filename
-    def getbuffer(self) -> bytes:
+    def getbuffer(self) -> memoryview:
+        # readinto a pre-sized bytearray: one copy out of the spooled file
+        # instead of read() allocating a second full bytes object.
+        readinto = getattr(self._uf.file, "readinto", None)
+        if readinto is None:
+            # SpooledTemporaryFile only grew readinto in Python 3.11; the
+            # production image runs 3.10, so fall back to a plain read.
+            self._uf.file.seek(0)
+            return memoryview(self._uf.file.read())
+        size = self._uf.size
+        if size is None:
+            self._uf.file.seek(0, os.SEEK_END)
+            size = self._uf.file.tell()
+        buf = bytearray(size)
         self._uf.file.seek(0)
-        return self._uf.file.read()
+        readinto(buf)
+        return memoryview(buf)
 
 def read_pdf_via_handler(handler, path: str) -> str:
     if hasattr(handler, "read_pdf"):
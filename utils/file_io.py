@@ -8,8 +8,7 @@ import uuid
 from typing import Iterable, List
 from logger import GLOBAL_LOGGER as log
 from exception.custom_exception import DocumentPortalException
-
-SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt", ".ppt", ".pptx", ".md", ".csv", ".xlsx", ".db", ".sqlite", ".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp", ".html", ".htm", ".xhtml"}
+from utils.document_ops import SUPPORTED_EXTENSIONS
 
 # ----------------------------- #
 # Helpers (file I/O + loading)  #